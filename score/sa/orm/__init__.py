@@ -28,12 +28,12 @@
 from .base import create_base, cls2tbl, tbl2cls, IdType
 from ._init import init, ConfiguredSaOrmModule, DEFAULTS
 from ._session import QueryIdsMixin
-from .dataloader import load_data
+from .dataloader import load_data, load_data_many
 from .helpers import create_collection_class, create_relationship_class
 
 __version__ = '0.4.0'
 
 __all__ = (
     'create_base', 'init', 'ConfiguredSaOrmModule', 'DEFAULTS', 'cls2tbl',
-    'tbl2cls', 'IdType', 'QueryIdsMixin', 'load_data',
+    'tbl2cls', 'IdType', 'QueryIdsMixin', 'load_data', 'load_data_many',
     'create_collection_class', 'create_relationship_class')
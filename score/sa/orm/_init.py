@@ -25,17 +25,24 @@
 # the discretion of STRG.AT GmbH also the competent court, in whose district
 # the Licensee has his registered seat, an establishment or assets.
 
+import collections
 from score.init import (
     ConfiguredModule, ConfigurationError, parse_dotted_path, parse_bool)
 import sqlalchemy as sa
+try:
+    from zope.sqlalchemy import register as register_zope_transaction
+except ImportError:
+    register_zope_transaction = None
 
 from ._session import sessionmaker, QueryIdsMixin
 from .base import BaseMeta
 from .triggers import CreateInheritanceTrigger, DropInheritanceTrigger
-from .views import (
-    generate_drop_inheritance_view_statement,
-    generate_create_inheritance_view_statement,
-)
+from .views import DropView, generate_create_inheritance_view_statement
+
+
+# Dialects whose drivers accept multiple semicolon-separated statements in a
+# single call. The sqlite driver only ever executes one statement per call.
+_MULTI_STATEMENT_DIALECTS = ('postgresql',)
 
 
 DEFAULTS = {
@@ -98,13 +105,23 @@ def init(confdict, db, ctx=None):
             'transactions in score.sa.db (by setting ctx.transaction to '
             '`False`) or disable ctx support for this module by setting '
             'ctx.member to `None`.')
+    zope_transactions = parse_bool(conf['zope_transactions'])
+    if register_zope_transaction is None and (
+            zope_transactions or (ctx and ctx_member)):
+        raise ConfigurationError(
+            'score.sa.orm',
+            'Package zope.sqlalchemy is required for zope transactions and '
+            'for sessions in Context objects')
     if db.engine.dialect.name == 'sqlite':
+        # the "connect" event fires exactly once per new DBAPI connection,
+        # so the pragma is never issued twice on the same connection.
         @sa.event.listens_for(db.engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
             cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
-    zope_transactions = parse_bool(conf['zope_transactions'])
+            try:
+                cursor.execute("PRAGMA foreign_keys=ON")
+            finally:
+                cursor.close()
     return ConfiguredSaOrmModule(db, ctx, Base, ctx_member, zope_transactions)
 
 
@@ -122,7 +139,7 @@ class ConfiguredSaOrmModule(ConfiguredModule):
         self.ctx_member = ctx_member
         self.zope_transactions = zope_transactions
         self.Session = None
-        self.session_mixins = {QueryIdsMixin}
+        self.session_mixins = [QueryIdsMixin]
         if ctx and ctx_member:
             ctx.register(ctx_member,
                          self._create_ctx_session,
@@ -161,12 +178,17 @@ class ConfiguredSaOrmModule(ConfiguredModule):
             except BadPunchLineException:
                 pass  # out
 
+        Mixins become bases of the session class in the order they were
+        added, which also determines their method resolution order. Adding
+        the same mixin twice has no effect.
+
         This function must be called before this object is finalized.
         """
         if self._finalized:
             raise Exception(
                 'Cannot add session mixin: module already finalized')
-        self.session_mixins.add(mixin)
+        if mixin not in self.session_mixins:
+            self.session_mixins.append(mixin)
 
     def _finalize(self):
         kwargs = {
@@ -174,7 +196,6 @@ class ConfiguredSaOrmModule(ConfiguredModule):
         }
         self.Session = sessionmaker(self, **kwargs)
         if self.zope_transactions:
-            from zope.sqlalchemy import register as register_zope_transaction
             register_zope_transaction(self.Session)
 
     def get_session(self, ctx):
@@ -195,7 +216,6 @@ class ConfiguredSaOrmModule(ConfiguredModule):
         """
         :term:`Context member <context member>` constructor.
         """
-        from zope.sqlalchemy import register as register_zope_transaction
         if self.db.ctx_member:
             connection = self.db.get_connection(ctx)
         else:
@@ -220,22 +240,55 @@ class ConfiguredSaOrmModule(ConfiguredModule):
         # create all tables
         self.Base.metadata.create_all(self.db.engine)
         session = self.Session()
-        # generate inheritance views and triggers: we do this starting with the
-        # base class and working our way down the inheritance hierarchy
-        classes = [cls for cls in self.Base.__subclasses__()
-                   if cls.__score_sa_orm__['parent'] is None]
-        while classes:
-            for cls in classes:
-                self._create_inheritance_trigger(session, cls)
-                self._create_inheritance_view(session, cls)
-            classes = [sub for cls in classes for sub in cls.__subclasses__()]
+        connection = session.connection()
+        dialect = connection.dialect
+        statements = []
+        for cls in self._inheritance_ordered_classes():
+            statements.extend(self._create_inheritance_trigger(cls, dialect))
+            statements.extend(self._create_inheritance_view(cls, dialect))
+        self._execute_ddl(connection, statements)
         session.commit()
 
-    def _create_inheritance_trigger(self, session, class_):
+    def _execute_ddl(self, connection, statements):
         """
-        Creates the inheritance trigger for given *class_*. This trigger will
-        delete entries from parent tables, whenever a row in the given table is
-        deleted.
+        Executes all given DDL *statements* (SQL strings) on given
+        *connection*. The statements are sent as a single script to databases
+        supporting multiple statements per call, one by one to all others.
+        Entries in *statements* evaluating to `None` are skipped.
+        """
+        sql = [stmt for stmt in statements if stmt is not None]
+        if connection.dialect.name in _MULTI_STATEMENT_DIALECTS and sql:
+            sql = [';\n'.join(part.rstrip().rstrip(';') for part in sql)]
+        for script in sql:
+            _exec_driver_sql(connection, script)
+
+    def _inheritance_ordered_classes(self):
+        """
+        Returns all classes deriving from the configured :attr:`Base`, ordered
+        by their depth in the inheritance hierarchy: the direct descendants of
+        the base class come first, followed by their sub-classes, etc.
+        """
+        queue = collections.deque(
+            cls for cls in self.Base.__subclasses__()
+            if cls.__score_sa_orm__['parent'] is None)
+        visited = set(queue)
+        ordered = []
+        while queue:
+            cls = queue.popleft()
+            ordered.append(cls)
+            for sub in cls.__subclasses__():
+                if sub not in visited:
+                    visited.add(sub)
+                    queue.append(sub)
+        return ordered
+
+    def _create_inheritance_trigger(self, class_, dialect):
+        """
+        Returns the SQL statements for (re-)creating the inheritance trigger
+        of given *class_* in given *dialect* as a tuple ``(drop, create)``,
+        where ``create`` is `None` if the class has no parent. This trigger
+        will delete entries from parent tables, whenever a row in the given
+        table is deleted.
 
         Example: assuming the given class ``Administrator`` is a sub-class of
         ``User``, this will create an sqlite trigger like the following:
@@ -246,20 +299,22 @@ class ConfiguredSaOrmModule(ConfiguredModule):
               DELETE FROM _user WHERE id = OLD.id;
             END
         """
-        parent_tables = []
         parent = class_.__score_sa_orm__['parent']
-        while parent:
-            parent_tables.append(parent.__table__)
-            parent = parent.__score_sa_orm__['parent']
-        session.execute(DropInheritanceTrigger(class_.__table__))
-        if parent_tables:
-            session.execute(CreateInheritanceTrigger(
-                class_.__table__, parent_tables[0]))
-
-    def _create_inheritance_view(self, session, class_):
+        table_name = class_.__table__.name
+        drop = _compile_drop_trigger(table_name, dialect)
+        create = None
+        if parent is not None:
+            create = _compile_create_trigger(
+                table_name, parent.__table__.name, dialect)
+        return drop, create
+
+    def _create_inheritance_view(self, class_, dialect):
         """
-        Creates the inheritance view for given *class_*. The view combines all
-        fields in the given class, as well as those in parent classes.
+        Returns the SQL statements for (re-)creating the inheritance view of
+        given *class_* in given *dialect* as a tuple ``(drop, create)``, where
+        ``create`` is `None` if the class does not support inheritance. The
+        view combines all fields in the given class, as well as those in
+        parent classes.
 
         Example: assuming the following table structure:
 
@@ -281,8 +336,65 @@ class ConfiguredSaOrmModule(ConfiguredModule):
           SELECT f.id, f.name, i.format
           FROM _file f INNER JOIN _image i ON f.id = i.id
         """
-        dropview = generate_drop_inheritance_view_statement(class_)
-        session.execute(dropview)
+        dropview = _compile_drop_view(
+            class_.__score_sa_orm__['short_name'], dialect)
+        createview = None
         if class_.__score_sa_orm__['inheritance'] is not None:
-            createview = generate_create_inheritance_view_statement(class_)
-            session.execute(createview)
+            createview = _compile_ddl(
+                generate_create_inheritance_view_statement(class_), dialect)
+        return dropview, createview
+
+
+def _compile_ddl(statement, dialect):
+    return str(statement.compile(dialect=dialect,
+                                 compile_kwargs={'literal_binds': True}))
+
+
+# The SQL of the following statements only depends on the names of the
+# involved tables or views and on the name of the dialect, so each of them is
+# compiled only once per process. The cache is keyed on these names, since
+# every engine has its own dialect instance, and since it should keep neither
+# dialects nor mapped classes alive.
+_compiled_ddl = {}
+
+
+def _compile_cached(key, dialect, statement):
+    """
+    Returns the SQL of the statement identified by *key* in given *dialect*.
+    The callable *statement* is only invoked to create the statement, if its
+    SQL was not compiled yet.
+    """
+    key += (dialect.name,)
+    try:
+        return _compiled_ddl[key]
+    except KeyError:
+        pass
+    sql = _compiled_ddl[key] = _compile_ddl(statement(), dialect)
+    return sql
+
+
+def _compile_drop_trigger(table_name, dialect):
+    return _compile_cached(
+        ('drop-trigger', table_name), dialect,
+        lambda: DropInheritanceTrigger(sa.table(table_name)))
+
+
+def _compile_create_trigger(table_name, parent_name, dialect):
+    return _compile_cached(
+        ('create-trigger', table_name, parent_name), dialect,
+        lambda: CreateInheritanceTrigger(
+            sa.table(table_name), sa.table(parent_name)))
+
+
+def _compile_drop_view(view_name, dialect):
+    return _compile_cached(
+        ('drop-view', view_name), dialect, lambda: DropView(view_name))
+
+
+def _exec_driver_sql(connection, sql):
+    try:
+        execute = connection.exec_driver_sql
+    except AttributeError:
+        # sqlalchemy < 1.4 accepts plain strings in execute()
+        execute = connection.execute
+    execute(sql)
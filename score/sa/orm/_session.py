@@ -26,6 +26,20 @@
 # the Licensee has his registered seat, an establishment or assets.
 
 import sqlalchemy.orm.session
+from sqlalchemy.orm.util import identity_key
+
+
+# Maximum number of ids passed to a single IN() clause. Some databases limit
+# the number of bound parameters per statement (sqlite used to allow 999).
+_BY_IDS_CHUNK_SIZE = 500
+
+# Requests for up to this many ids are answered with a list, larger ones are
+# streamed.
+_BY_IDS_LIST_THRESHOLD = 1000
+
+# Number of rows fetched from the database at once while streaming the
+# results of by_ids().
+_BY_IDS_YIELD_PER = 200
 
 
 class IdsNotFound(Exception):
@@ -47,17 +61,20 @@ class QueryIdsMixin:
 
     def by_ids(self, type, ids, *, ignore_missing=True):
         """
-        Yields objects of *type* with given *ids*. The function will return the
-        objects in the order of their id in the *ids* parameter. The following
-        code will print the User with id #4 first, followed by
-        the users #2 and #5::
+        Provides objects of *type* with given *ids* as an iterable. The
+        function will return the objects in the order of their id in the *ids*
+        parameter. The following code will print the User with id #4 first,
+        followed by the users #2 and #5::
 
           for user in session.by_ids(User, [4,2,5]):
             print(user)
 
         If *ignore_missing* evaluates to `False`, the function will raise an
         :class:`IdsNotFound` exception if any of the ids were not present in
-        the database.
+        the database. Small numbers of *ids* are returned as a list, in which
+        case the exception is raised immediately. Larger numbers of *ids* are
+        streamed from the database, and the objects preceding the first missing
+        id may already have been yielded when the exception is raised.
 
         The main use case of this function is retrieval of objects, that were
         found through queries on external resources, such as full text indexing
@@ -65,23 +82,74 @@ class QueryIdsMixin:
 
         .. _elasticsearch: https://www.elastic.co/products/elasticsearch
         """
-        if not ignore_missing:
-            rows = self.query(type.id).filter(type.id.in_(ids)).all()
-            if len(rows) != len(ids):
-                existing_ids = list(row[0] for row in rows)
-                missing_ids = list(id for id in ids if id not in existing_ids)
-                raise IdsNotFound(missing_ids)
-        chunk_size = 20
-        while len(ids) > 0:
-            chunk = ids[0:chunk_size]
-            ids = ids[chunk_size:]
-            result = dict(self.query(type.id, type).
-                          filter(type.id.in_(chunk)))
-            for id in chunk:
-                try:
-                    yield result[id]
-                except KeyError:
-                    pass
+        if len(ids) > _BY_IDS_LIST_THRESHOLD:
+            return self._by_ids_stream(
+                type, ids, ignore_missing=ignore_missing)
+        found, query_ids = self._by_ids_from_identity_map(type, ids)
+        for offset in range(0, len(query_ids), _BY_IDS_CHUNK_SIZE):
+            chunk = query_ids[offset:offset + _BY_IDS_CHUNK_SIZE]
+            for obj in self.query(type).filter(type.id.in_(chunk)):
+                found[obj.id] = obj
+        if not ignore_missing and len(found) != len(set(ids)):
+            raise IdsNotFound(list(id for id in ids if id not in found))
+        return [found[id] for id in ids if id in found]
+
+    def _by_ids_from_identity_map(self, type, ids):
+        """
+        Looks up objects of *type* with given *ids* in the identity map of
+        this session. Returns a dict mapping the ids of all objects found to
+        the objects, as well as a list of ids, that still need to be queried.
+        """
+        found = {}
+        query_ids = []
+        if ids:
+            # flush pending changes, just like the query would
+            self._autoflush()
+        deleted = self.deleted
+        for id in ids:
+            obj = self.identity_map.get(identity_key(type, id))
+            # expired objects and objects marked for deletion need to be
+            # checked against the database
+            if obj is not None and isinstance(obj, type) and \
+                    not sqlalchemy.inspect(obj).expired and \
+                    obj not in deleted:
+                found[id] = obj
+            else:
+                query_ids.append(id)
+        return found, query_ids
+
+    def _by_ids_stream(self, type, ids, *, ignore_missing=True):
+        """
+        Generator variant of :meth:`by_ids`, that streams the objects from the
+        database and yields them as early as their order allows.
+        """
+        found, query_ids = self._by_ids_from_identity_map(type, ids)
+        missing = set()
+        position = 0
+        for offset in range(0, len(query_ids), _BY_IDS_CHUNK_SIZE):
+            chunk = query_ids[offset:offset + _BY_IDS_CHUNK_SIZE]
+            query = self.query(type).filter(type.id.in_(chunk)).\
+                yield_per(_BY_IDS_YIELD_PER)
+            for obj in query:
+                found[obj.id] = obj
+                # yield everything up to the next id we are still waiting for
+                while position < len(ids) and ids[position] in found:
+                    yield found[ids[position]]
+                    position += 1
+            # ids of this chunk, that did not arrive, are missing
+            missing.update(id for id in chunk if id not in found)
+            while position < len(ids):
+                id = ids[position]
+                if id in found:
+                    yield found[id]
+                elif id not in missing or not ignore_missing:
+                    break
+                position += 1
+        if missing and not ignore_missing:
+            raise IdsNotFound(list(id for id in ids if id in missing))
+        for id in ids[position:]:
+            if id in found:
+                yield found[id]
 
 
 def sessionmaker(conf, *args, **kwargs):
@@ -96,14 +164,33 @@ def sessionmaker(conf, *args, **kwargs):
     except KeyError:
         base = sqlalchemy.orm.session.Session
     bases = (base,) + tuple(conf.session_mixins)
-
-    def __init__(self, *args, **kwargs):
-        self.conf = conf
-        for base in bases:
-            base.__init__(self, *args, **kwargs)
-
     ConfiguredSession = type('ConfiguredSession', bases, {
-        '__init__': __init__
+        '__init__': _generate_init(conf, bases)
     })
     kwargs['class_'] = ConfiguredSession
     return sqlalchemy.orm.sessionmaker(*args, **kwargs)
+
+
+def _generate_init(conf, bases):
+    """
+    Generates the ``__init__`` function of a session class with given *bases*.
+    The generated function assigns *conf* and calls the constructors of all
+    *bases* without looping over them on each call:
+
+    .. code-block:: python
+
+        def __init__(self, *args, **kwargs):
+            self.conf = _conf
+            _init0(self, *args, **kwargs)
+            _init1(self, *args, **kwargs)
+    """
+    namespace = {'_conf': conf}
+    lines = [
+        'def __init__(self, *args, **kwargs):',
+        '    self.conf = _conf',
+    ]
+    for i, base in enumerate(bases):
+        namespace['_init%d' % i] = base.__init__
+        lines.append('    _init%d(self, *args, **kwargs)' % i)
+    exec('\n'.join(lines), namespace)
+    return namespace['__init__']
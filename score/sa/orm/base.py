@@ -25,7 +25,9 @@
 # the discretion of STRG.AT GmbH also the competent court, in whose district
 # the Licensee has his registered seat, an establishment or assets.
 
+import functools
 import re
+import types
 import sqlalchemy as sa
 try:
     from sqlalchemy.orm import declarative_base
@@ -46,6 +48,16 @@ IdType = IdType.with_variant(sa.Integer, 'sqlite')
 _first_cap_re = re.compile('(.)([A-Z][a-z]+)')
 _all_cap_re = re.compile('([a-z0-9])([A-Z])')
 
+_VALID_INHERITANCE = frozenset(('single-table', 'joined-table', None))
+
+# read-only stand-in for classes without __mapper_args__
+_NO_MAPPER_ARGS = types.MappingProxyType({})
+
+_MISSING = object()
+
+# keyword arguments of all generated id columns
+_ID_KWARGS = {'primary_key': True, 'unique': True}
+
 
 def cls2tbl(cls):
     """
@@ -55,12 +67,18 @@ def cls2tbl(cls):
     the underscore will yield the name of the class's :ref:`view
     <sa_orm_view>`.
     """
-    if isinstance(cls, type):
-        cls = cls.__name__
-    s1 = _first_cap_re.sub(r'\1_\2', cls)
-    return '_' + _all_cap_re.sub(r'\1_\2', s1).lower()
+    name = cls if isinstance(cls, str) else cls.__name__
+    return _cls2tbl_name(name)
+
 
+@functools.lru_cache(maxsize=None)
+def _cls2tbl_name(name):
+    s1 = _first_cap_re.sub(r'\1_\2', name)
+    s2 = _all_cap_re.sub(r'\1_\2', s1).lower()
+    return f'_{s2}'
 
+
+@functools.lru_cache(maxsize=None)
 def tbl2cls(tbl):
     """
     Inverse of :func:`.cls2tbl`. Returns the name of a class.
@@ -72,7 +90,7 @@ def tbl2cls(tbl):
 
 
 def clsname(cls):
-    return '%s.%s' % (cls.__module__, cls.__name__)
+    return f'{cls.__module__}.{cls.__name__}'
 
 
 class ConfigurationError(Exception):
@@ -89,12 +107,28 @@ class BaseMeta(DeclarativeMeta):
         Normalizes configuration values of new database classes.
         """
         if hasattr(cls, '__score_sa_orm__'):
-            BaseMeta.set_config(cls, classname, bases, attrs)
-            BaseMeta.set_tablename(cls, classname, bases, attrs)
-            BaseMeta.configure_inheritance(cls, classname, bases, attrs)
-            BaseMeta.set_id(cls, classname, bases, attrs)
+            BaseMeta._configure(cls, classname, bases, attrs)
         DeclarativeMeta.__init__(cls, classname, bases, attrs)
 
+    def _configure(cls, classname, bases, attrs):
+        """
+        Performs the same steps as :meth:`set_config`, :meth:`set_tablename`,
+        :meth:`configure_inheritance` and :meth:`set_id`, but determines the
+        base and parent classes in a single pass over *bases* and reads the
+        ``__mapper_args__`` only once.
+        """
+        if '__score_sa_orm__' not in attrs:
+            cls.__score_sa_orm__ = attrs['__score_sa_orm__'] = {}
+        cfg = cls.__score_sa_orm__
+        BaseMeta._set_base_and_parent_config(cls, bases)
+        mapper_args = attrs.get('__mapper_args__', _NO_MAPPER_ARGS)
+        BaseMeta.set_inheritance_config(cls, classname, bases, attrs)
+        BaseMeta._set_type_name_config(cls, classname, cfg, mapper_args)
+        BaseMeta._set_type_column_config(cls, cfg, mapper_args)
+        BaseMeta.set_tablename(cls, classname, bases, attrs)
+        BaseMeta.configure_inheritance(cls, classname, bases, attrs)
+        BaseMeta.set_id(cls, classname, bases, attrs)
+
     def set_config(cls, classname, bases, attrs):
         """
         Sets the class' __score_sa_orm__ value with the computed configuration.
@@ -104,75 +138,101 @@ class BaseMeta(DeclarativeMeta):
         - base: the :term:`base class` of this class.
         - parent: the parent class in the inheritance hierarchy towards
             Base.
+        - parent_chain: tuple of all ancestors in the inheritance hierarchy,
+            starting with the parent and ending with the direct descendant of
+            Base.
         - inheritance: the inheritance type
         - type_name: name of this type in the database, as stored in the
             type_column.
         - type_column: name of the column containing the type_name
+        - short_name: the table name without its leading underscore, which
+            is also the name of the class's view.
+        - id_ref: the foreign key target of the class's id column, i.e.
+            ``<tablename>.id``.
         """
         if '__score_sa_orm__' not in attrs:
             cls.__score_sa_orm__ = attrs['__score_sa_orm__'] = {}
-        BaseMeta.set_base_config(cls, classname, bases, attrs)
-        BaseMeta.set_parent_config(cls, classname, bases, attrs)
+        BaseMeta._set_base_and_parent_config(cls, bases)
         BaseMeta.set_inheritance_config(cls, classname, bases, attrs)
         BaseMeta.set_type_name_config(cls, classname, bases, attrs)
         BaseMeta.set_type_column_config(cls, classname, bases, attrs)
 
     def set_base_config(cls, classname, bases, attrs):
+        BaseMeta._set_base_and_parent_config(cls, bases)
+
+    def set_parent_config(cls, classname, bases, attrs):
+        BaseMeta._set_base_and_parent_config(cls, bases)
+
+    def _set_base_and_parent_config(cls, bases):
+        """
+        Determines both the base and the parent class with a single pass over
+        given *bases*.
+        """
+        cfg = cls.__score_sa_orm__
         base_classes = dict()
+        parents = []
         for base in bases:
-            if hasattr(base, '__score_sa_orm__'):
-                base_classes[base.__score_sa_orm__['base']] = base
+            if not hasattr(base, '__score_sa_orm__'):
+                continue
+            Base = base.__score_sa_orm__['base']
+            base_classes[Base] = base
+            if base is not Base:
+                parents.append(base)
         if len(base_classes) > 1:
             raise ConfigurationError(
                 'Multiple base class parents for class %s:\n- %s' % (
                     clsname(cls),
-                    '\n- '.join(base_classes.values())))
-        cls.__score_sa_orm__['base'] = next(iter(base_classes))
-
-    def set_parent_config(cls, classname, bases, attrs):
-        cfg = cls.__score_sa_orm__
-        cfg['parent'] = None
-        for base in bases:
-            if base != cfg['base'] and issubclass(base, cfg['base']):
-                if cfg['parent'] is not None:
-                    raise ConfigurationError(
-                        'Diamond inheritance from Base class in %s' %
-                        clsname(cls))
-                cfg['parent'] = base
+                    '\n- '.join(map(clsname, base_classes.values()))))
+        if len(parents) > 1:
+            raise ConfigurationError(
+                'Diamond inheritance from Base class in %s' % clsname(cls))
+        cfg['base'] = next(iter(base_classes))
+        if parents:
+            parent = parents[0]
+            cfg['parent'] = parent
+            cfg['parent_chain'] = \
+                (parent,) + parent.__score_sa_orm__['parent_chain']
+        else:
+            cfg['parent'] = None
+            cfg['parent_chain'] = ()
 
     def set_inheritance_config(cls, classname, bases, attrs):
         cfg = cls.__score_sa_orm__
         parent = cfg['parent']
+        inheritance = cfg.get('inheritance', _MISSING)
         if parent is not None:
             # this is a sub-class of another class that should
             # already have the 'polymorphic_on' configuration.
-            inheritance = parent.__score_sa_orm__['inheritance']
-            if inheritance is None:
+            parent_inheritance = parent.__score_sa_orm__['inheritance']
+            if parent_inheritance is None:
                 raise ConfigurationError(
                     'Parent table of %s does not support inheritance' %
                     clsname(cls))
-            if 'inheritance' not in cfg:
-                cfg['inheritance'] = inheritance
-            elif cfg['inheritance'] != inheritance:
+            if inheritance is _MISSING:
+                cfg['inheritance'] = parent_inheritance
+            elif inheritance != parent_inheritance:
                 raise ConfigurationError(
                     'Cannot change inheritance type of %s in subclass %s' %
                     (parent.__name__, clsname(cls)))
-        elif 'inheritance' not in cfg:
+        elif inheritance is _MISSING:
             cfg['inheritance'] = 'joined-table'
-        elif cfg['inheritance'] not in ('single-table', 'joined-table', None):
+        elif inheritance not in _VALID_INHERITANCE:
             raise ConfigurationError(
                 'Invalid inheritance configuration "%s" in class %s' %
-                cfg['inheritance'], clsname(cls))
+                (inheritance, clsname(cls)))
 
     def set_type_name_config(cls, classname, bases, attrs):
-        cfg = cls.__score_sa_orm__
+        BaseMeta._set_type_name_config(
+            cls, classname, cls.__score_sa_orm__,
+            attrs.get('__mapper_args__', _NO_MAPPER_ARGS))
+
+    def _set_type_name_config(cls, classname, cfg, mapper_args):
         if 'type_name' not in cfg:
-            if 'polymorphic_identity' in attrs.get('__mapper_args__', {}):
-                type_name = attrs['__mapper_args__']['polymorphic_identity']
-                cfg['type_name'] = type_name
+            if 'polymorphic_identity' in mapper_args:
+                cfg['type_name'] = mapper_args['polymorphic_identity']
             else:
-                cfg['type_name'] = cls2tbl(classname)[1:]
-        elif 'polymorphic_identity' in attrs.get('__mapper_args__', {}):
+                cfg['type_name'] = _cls2tbl_name(classname)[1:]
+        elif 'polymorphic_identity' in mapper_args:
             raise ConfigurationError(
                 'Both sqlalchemy and score.sa.orm configured with a '
                 'polymorphic identity,\n'
@@ -181,13 +241,17 @@ class BaseMeta(DeclarativeMeta):
                 ' - __score_sa_orm__[type_name]' % (clsname(cls),))
 
     def set_type_column_config(cls, classname, bases, attrs):
-        cfg = cls.__score_sa_orm__
+        BaseMeta._set_type_column_config(
+            cls, cls.__score_sa_orm__,
+            attrs.get('__mapper_args__', _NO_MAPPER_ARGS))
+
+    def _set_type_column_config(cls, cfg, mapper_args):
         if 'type_column' not in cfg:
-            if 'polymorphic_on' in attrs.get('__mapper_args__', {}):
-                cfg['type_column'] = attrs['__mapper_args__']['polymorphic_on']
+            if 'polymorphic_on' in mapper_args:
+                cfg['type_column'] = mapper_args['polymorphic_on']
             else:
                 cfg['type_column'] = '_type'
-        if 'polymorphic_on' in attrs.get('__mapper_args__', {}):
+        if 'polymorphic_on' in mapper_args:
             raise ConfigurationError(
                 'Both sqlalchemy and score.sa.orm configured with a type '
                 'column,\n'
@@ -197,14 +261,19 @@ class BaseMeta(DeclarativeMeta):
 
     def set_tablename(cls, classname, bases, attrs):
         """
-        Sets the ``__tablename__`` member for sqlalchemy.
+        Sets the ``__tablename__`` member for sqlalchemy, as well as the
+        ``short_name`` and ``id_ref`` configuration values derived from it.
         """
-        if cls.__score_sa_orm__['inheritance'] == 'single-table' and \
-                cls.__score_sa_orm__['parent'] is not None:
+        cfg = cls.__score_sa_orm__
+        if cfg['inheritance'] == 'single-table' and cfg['parent'] is not None:
             # this is a sub-class of another class that should
             # already have a __tablename__ attribute.
-            return
-        cls.__tablename__ = attrs['__tablename__'] = cls2tbl(classname)
+            tablename = cls.__tablename__
+        else:
+            tablename = _cls2tbl_name(classname)
+            cls.__tablename__ = attrs['__tablename__'] = tablename
+        cfg['short_name'] = tablename[1:]
+        cfg['id_ref'] = '%s.id' % tablename
 
     def configure_inheritance(cls, classname, bases, attrs):
         """
@@ -251,19 +320,18 @@ class BaseMeta(DeclarativeMeta):
         if 'id' in attrs:
             # do not override explicitly defined id column
             return
-        Base = cls.__score_sa_orm__['base']
-        args = [Base.__score_sa_orm__['id_type']]
-        for base in bases:
-            if base != Base and issubclass(base, Base):
-                args.append(sa.ForeignKey('%s.id' % base.__tablename__,
-                                          ondelete='CASCADE',
-                                          onupdate='CASCADE'))
-                break
-        cls.id = attrs['id'] = sa.Column(*args, primary_key=True, unique=True)
-        if cls.__score_sa_orm__['inheritance'] == 'joined-table' and \
-                cls.__score_sa_orm__['parent'] is not None:
-            cls.__mapper_args__['inherit_condition'] = (
-                cls.id == cls.__score_sa_orm__['parent'].id)
+        cfg = cls.__score_sa_orm__
+        parent = cfg['parent']
+        if parent is not None:
+            fk_args = (sa.ForeignKey(parent.__score_sa_orm__['id_ref'],
+                                     ondelete='CASCADE',
+                                     onupdate='CASCADE'),)
+        else:
+            fk_args = ()
+        cls.id = attrs['id'] = sa.Column(
+            cfg['base'].__score_sa_orm__['id_type'], *fk_args, **_ID_KWARGS)
+        if cfg['inheritance'] == 'joined-table' and parent is not None:
+            cls.__mapper_args__['inherit_condition'] = (cls.id == parent.id)
 
 
 def create_base(*, id_type=IdType):
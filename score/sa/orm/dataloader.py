@@ -25,13 +25,43 @@
 # the discretion of STRG.AT GmbH also the competent court, in whose district
 # the Licensee has his registered seat, an establishment or assets.
 
+import concurrent.futures
 from datetime import datetime
 import io
+import os
 from score.init import parse_dotted_path
 from score.sa.db import Enum, EnumType
 import sqlalchemy as sa
 from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 import urllib.request
+import weakref
+try:
+    import yaml
+except ImportError:
+    yaml = None
+    _YAML_LOADER = None
+else:
+    # prefer the libyaml-based loader, if PyYAML was compiled with it
+    _YAML_LOADER = getattr(yaml, 'CLoader', yaml.Loader)
+
+
+# the classes already resolved by _resolve_class(), that still exist
+_resolved_classes = weakref.WeakValueDictionary()
+
+
+def _resolve_class(classname):
+    """
+    Returns the class with given dotted *classname*, as interpreted by
+    :func:`score.init.parse_dotted_path`. Each name is only resolved once for
+    as long as its class exists.
+    """
+    try:
+        return _resolved_classes[classname]
+    except KeyError:
+        pass
+    cls = _resolved_classes[classname] = parse_dotted_path(classname)
+    return cls
 
 
 class DataLoaderException(Exception):
@@ -50,13 +80,35 @@ def load_data(thing, objects=None):
         if generate_dummy_data:
             objects = load_data('dummy.yaml', objects)
     """
-    if isinstance(thing, io.IOBase):
-        return load_yaml(thing, objects)
-    if not isinstance(thing, str):
-        raise DataLoaderException('Could not determine loader to use')
-    if ':' in thing:
-        return load_url(thing, objects)
-    return load_yaml(thing, objects)
+    return _postprocess(_read_data(thing), objects)
+
+
+def load_data_many(things, objects=None):
+    """
+    Loads data from all given *things*, as if they were a single source. See
+    :func:`load_data` for the description of the individual *things* and the
+    *objects* parameter.
+
+    The sources are read and parsed concurrently, which is mostly beneficial
+    when loading from URLs or from many files. Objects in any source may
+    reference objects defined in any other source.
+
+    .. code-block:: python
+
+        objects = load_data_many(['users.yaml', 'blogs.yaml'])
+    """
+    things = list(things)
+    data = {}
+    if things:
+        max_workers = min(len(things), os.cpu_count() or 1)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            results = list(executor.map(_read_data, things))
+        # merging and post-processing must happen in this thread, since
+        # _postprocess() modifies the shared *objects*.
+        for result in results:
+            for classname in result or ():
+                data.setdefault(classname, {}).update(result[classname] or {})
+    return _postprocess(data, objects)
 
 
 def load_url(url, objects=None):
@@ -64,7 +116,7 @@ def load_url(url, objects=None):
     Loads objects from a yaml resources under given *url*. See
     :func:`load_data` for the description of the *objects* parameter.
     """
-    return load_yaml(urllib.request.urlopen(url))
+    return _postprocess(_read_url(url), objects)
 
 
 def load_yaml(file, objects=None):
@@ -72,97 +124,199 @@ def load_yaml(file, objects=None):
     Loads objects from a yaml *file*. See :func:`load_data` for the description
     of the *objects* parameter.
     """
-    import yaml
-    try:
-        from yaml import CLoader as Loader
-    except ImportError:
-        from yaml import Loader
+    return _postprocess(_read_yaml(file), objects)
+
+
+def _read_data(thing):
+    if isinstance(thing, io.IOBase):
+        return _read_yaml(thing)
+    if not isinstance(thing, str):
+        raise DataLoaderException('Could not determine loader to use')
+    if ':' in thing:
+        return _read_url(thing)
+    return _read_yaml(thing)
+
+
+def _read_url(url):
+    return _read_yaml(urllib.request.urlopen(url))
+
+
+def _read_yaml(file):
+    if yaml is None:
+        raise ImportError('Loading yaml files requires PyYAML')
     if not isinstance(file, io.IOBase):
-        file = open(file)
-    return _postprocess(yaml.load(file, Loader=Loader), objects)
+        # pass the raw bytes, the yaml loader detects and decodes the
+        # encoding on its own
+        with open(file, 'rb') as fp:
+            file = fp.read()
+    return yaml.load(file, Loader=_YAML_LOADER)
 
 
 def _postprocess(data, objects=None):
     relationships = {}
     proxies = {}
-    columns = {}
+    converters = {}
+    setters = {}
     if not objects:
         objects = {}
         classes = {}
     else:
-        classes = dict((cls, parse_dotted_path(cls))
+        classes = dict((cls, _resolve_class(cls))
                        for cls in objects)
     for classname in data:
-        classes[classname] = parse_dotted_path(classname)
+        classes[classname] = _resolve_class(classname)
         cls = classes[classname]
-        relationships[classname] = {}
-        proxies[classname] = {}
-        for relationship in sa.inspect(cls).relationships:
-            relationships[classname][relationship.key] = relationship
-        columns[classname] = {}
-        for column in sa.inspect(cls).columns:
-            columns[classname][column.description] = column
+        relationships[classname], converters[classname], \
+            proxies[classname], setters[classname] = _introspect(cls)
         if classname not in objects:
             objects[classname] = {}
         objects[classname].update(dict((id, cls()) for id in data[classname]))
-        for member in dir(cls):
-            if member.startswith('__'):
-                continue
-            value = getattr(cls, member)
-            if isinstance(value, AssociationProxy):
-                proxies[classname][member] = value
-    for classname in data:
+    # maps every class to the names of all loaded classes deriving from it
+    subclasses = {}
+    for classname in objects:
+        for base in classes[classname].__mro__:
+            subclasses.setdefault(base, []).append(classname)
+    for classname, rows in data.items():
         cls = classes[classname]
-        for id in data[classname]:
-            obj = objects[classname][id]
-            if not data[classname][id]:
+        class_objects = objects[classname]
+        class_relationships = relationships[classname]
+        class_proxies = proxies[classname]
+        class_converters = converters[classname]
+        class_setters = setters[classname]
+        for id, row in rows.items():
+            if not row:
                 continue
-            for member in data[classname][id]:
-                value = data[classname][id][member]
-                if member in relationships[classname]:
-                    relcls = relationships[classname][member].argument
+            obj = class_objects[id]
+            for member, value in row.items():
+                if member in class_relationships:
+                    relcls = class_relationships[member].argument
                     if isinstance(relcls, sa.orm.Mapper):
                         relcls = relcls.class_
                     else:
                         relcls = relcls()
                     if not isinstance(relcls, type):
                         relcls = relcls.__class__
-                    value = _replace_object(classes, objects, relcls, value)
-                elif member in proxies[classname]:
-                    proxy = proxies[classname][member]
-                    col = proxy.attr[1].property.columns[0]
+                    value = _replace_object(subclasses, objects, relcls, value)
+                elif member in class_proxies:
+                    col, convert = class_proxies[member]
                     if isinstance(col.type, type(cls)):
                         value = _replace_object(
-                            classes, objects, relcls, value)
+                            subclasses, objects, relcls, value)
                     else:
-                        value = map(lambda v: _convert_value(v, col), value)
-                elif member in columns[classname]:
-                    value = _convert_value(value, columns[classname][member])
-                setattr(obj, member, value)
+                        value = [convert(v) for v in value]
+                elif member in class_converters:
+                    value = class_converters[member](value)
+                setter = class_setters.get(member)
+                if setter is None:
+                    setattr(obj, member, value)
+                else:
+                    setter(obj, value)
     return objects
 
 
-def _replace_object(classes, objects, cls, value):
+# the value converters of the columns and of the association proxies of each
+# class, along with the fingerprint (see _fingerprint()) of the class they
+# were created for
+_introspection_cache = weakref.WeakKeyDictionary()
+
+
+def _introspect(cls):
+    """
+    Returns the relationships, the value converters of all columns (see
+    :func:`_make_converter`), the association proxies and the setters of all
+    instrumented attributes of given *cls* as four dicts. The association
+    proxies dict maps the names of all proxies targeting a column to that
+    column and its value converter. The converters and the association proxies
+    are cached per class, until the class or its mapper is changed. The result
+    must not be modified.
+    """
+    mapper = sa.inspect(cls)
+    try:
+        fingerprint, converters, proxies = _introspection_cache[cls]
+    except KeyError:
+        fingerprint = None
+    if fingerprint != _fingerprint(cls, mapper):
+        converters = {}
+        for column in mapper.columns:
+            converters[column.description] = _make_converter(column)
+        # look at the raw class dicts instead of calling getattr() on every
+        # member, which would invoke the __get__ of all descriptors
+        proxy_names = []
+        seen = set()
+        for klass in cls.__mro__:
+            for member, value in vars(klass).items():
+                if member in seen or member.startswith('__'):
+                    continue
+                seen.add(member)
+                if isinstance(value, AssociationProxy):
+                    proxy_names.append(member)
+        # the proxies must not be accessed while iterating over the class
+        # dicts above, since this adds members to them
+        proxies = {}
+        for member in proxy_names:
+            prop = getattr(cls, member).attr[1].property
+            if isinstance(prop, sa.orm.ColumnProperty):
+                col = prop.columns[0]
+                proxies[member] = (col, _make_converter(col))
+        # the fingerprint is taken last, as accessing association proxies may
+        # add members to the class
+        _introspection_cache[cls] = (
+            _fingerprint(cls, mapper), converters, proxies)
+    # relationships and setters refer to the class, they are not cached to
+    # keep the cache from holding on to it
+    relationships = {}
+    for relationship in mapper.relationships:
+        relationships[relationship.key] = relationship
+    # calling the descriptor's __set__ directly skips the attribute lookup
+    # setattr() would perform for every single value
+    setters = {}
+    for prop in mapper.attrs:
+        attr = getattr(cls, prop.key, None)
+        if isinstance(attr, InstrumentedAttribute):
+            setters[prop.key] = attr.__set__
+    return relationships, converters, proxies, setters
+
+
+def _fingerprint(cls, mapper):
+    """
+    Returns a value, that changes whenever members are added to given *cls*,
+    to one of its base classes or to its *mapper*.
+    """
+    return len(mapper.attrs), tuple(len(vars(klass)) for klass in cls.__mro__)
+
+
+def _replace_object(subclasses, objects, cls, value):
     if isinstance(value, list):
-        def converter(item):
-            return _replace_object(classes, objects, cls, item)
-        return list(map(converter, value))
+        return [_replace_object(subclasses, objects, cls, item)
+                for item in value]
     key = '%s.%s' % (cls.__module__, cls.__name__)
     if key in objects:
         return objects[key][value]
-    for classname in objects:
-        othercls = classes[classname]
-        if not issubclass(othercls, cls):
-            continue
+    for classname in subclasses.get(cls, ()):
         if value in objects[classname]:
             return objects[classname][value]
     raise DataLoaderException('Could not find referenced object "%s"' % value)
 
 
-def _convert_value(value, column):
-    DateTime = sa.DateTime
-    if isinstance(column.type, DateTime) and not isinstance(value, datetime):
-        return datetime(value)
-    if isinstance(column.type, EnumType) and not isinstance(value, Enum):
-        return column.type.enum(value.strip())
-    return value
+def _make_converter(column):
+    """
+    Returns a function converting yaml values into values for given
+    *column*. The column type is inspected once here, instead of once for
+    every converted value.
+    """
+    if isinstance(column.type, sa.DateTime):
+        def convert(value):
+            if isinstance(value, datetime):
+                return value
+            return datetime(value)
+    elif isinstance(column.type, EnumType):
+        enum = column.type.enum
+
+        def convert(value):
+            if isinstance(value, Enum):
+                return value
+            return enum(value.strip())
+    else:
+        def convert(value):
+            return value
+    return convert
@@ -82,23 +82,25 @@ def create_relationship_class(cls1, cls2, member, *, classname=None,
     if Base != cls2.__score_sa_orm__['base']:
         raise ValueError('Provided classes have different base classes')
     IdType = Base.__score_sa_orm__['id_type']
-    idcol1 = cls1.__tablename__[1:] + '_id'
-    idcol2 = cls2.__tablename__[1:] + '_id'
-    refcol1 = cls1.__tablename__[1:]
-    refcol2 = cls2.__tablename__[1:]
+    cfg1 = cls1.__score_sa_orm__
+    cfg2 = cls2.__score_sa_orm__
+    refcol1 = cfg1['short_name']
+    refcol2 = cfg2['short_name']
+    idcol1 = refcol1 + '_id'
+    idcol2 = refcol2 + '_id'
     members = {
         '__score_sa_orm__': {
             'inheritance': None
         },
         idcol1: Column(
             IdType,
-            ForeignKey('%s.id' % cls1.__tablename__,
+            ForeignKey(cfg1['id_ref'],
                        onupdate="CASCADE",
                        ondelete="CASCADE"),
             nullable=False),
         idcol2: Column(
             IdType,
-            ForeignKey('%s.id' % cls2.__tablename__,
+            ForeignKey(cfg2['id_ref'],
                        onupdate="CASCADE",
                        ondelete="CASCADE"),
             nullable=False),
@@ -111,7 +113,7 @@ def create_relationship_class(cls1, cls2, member, *, classname=None,
         }
     if sorted:
         members['index'] = Column(Integer, nullable=False)
-    cls = type(classname, (cls1.__score_sa_orm__['base'],), members)
+    cls = type(classname, (Base,), members)
     if sorted:
         rel = relationship(cls2, secondary=cls.__tablename__,
                            order_by='%s.index' % classname,
@@ -158,7 +160,8 @@ def create_collection_class(owner, member, column, *,
         '__score_sa_orm__': {
             'inheritance': None
         },
-        'owner_id': Column(IdType, ForeignKey('%s.id' % owner.__tablename__),
+        'owner_id': Column(IdType,
+                           ForeignKey(owner.__score_sa_orm__['id_ref']),
                            nullable=False),
         'owner': relationship(owner, backref=bref),
         'value': column,
@@ -169,7 +172,7 @@ def create_collection_class(owner, member, column, *,
         members['__table_args__'] = (
             UniqueConstraint(members['owner_id'], column),
         )
-    cls = type(name, (owner.__score_sa_orm__['base'],), members)
+    cls = type(name, (Base,), members)
     proxy = association_proxy(member + '_wrapper', 'value',
                               creator=lambda v: cls(value=v))
     setattr(owner, member, proxy)
@@ -59,24 +59,32 @@ class CreateInheritanceTrigger(Executable, ClauseElement):
         self.parent = parent
 
 
+_SQLITE_CREATE_TRIGGER = textwrap.dedent("""
+    CREATE TRIGGER autodel{table} AFTER DELETE ON {table}
+    FOR EACH ROW BEGIN
+        DELETE FROM {parent} WHERE id = OLD.id;
+    END
+""").strip()
+
+
 @compiles(CreateInheritanceTrigger, 'sqlite')
 def visit_create_inheritance_trigger_sqlite(element, compiler, **kw):
-    return textwrap.dedent("""
-        CREATE TRIGGER autodel{table} AFTER DELETE ON {table}
-        FOR EACH ROW BEGIN
+    return _SQLITE_CREATE_TRIGGER.format(
+        parent=element.parent.name, table=element.table.name)
+
+
+_PG_CREATE_TRIGGER = textwrap.dedent("""
+    CREATE OR REPLACE FUNCTION autodel{parent}() RETURNS TRIGGER AS $_$
+        BEGIN
             DELETE FROM {parent} WHERE id = OLD.id;
-        END
-    """).strip().format(parent=element.parent.name, table=element.table.name)
+            RETURN OLD;
+        END $_$ LANGUAGE 'plpgsql';
+    CREATE TRIGGER autodel{table} AFTER DELETE ON {table}
+    FOR EACH ROW EXECUTE PROCEDURE autodel{parent}();
+""").strip()
 
 
 @compiles(CreateInheritanceTrigger, 'postgresql')
 def visit_create_inheritance_trigger_postgresql(element, compiler, **kw):
-    return textwrap.dedent("""
-        CREATE OR REPLACE FUNCTION autodel{parent}() RETURNS TRIGGER AS $_$
-            BEGIN
-                DELETE FROM {parent} WHERE id = OLD.id;
-                RETURN OLD;
-            END $_$ LANGUAGE 'plpgsql';
-        CREATE TRIGGER autodel{table} AFTER DELETE ON {table}
-        FOR EACH ROW EXECUTE PROCEDURE autodel{parent}();
-    """).strip().format(parent=element.parent.name, table=element.table.name)
+    return _PG_CREATE_TRIGGER.format(
+        parent=element.parent.name, table=element.table.name)
@@ -28,18 +28,16 @@
 from sqlalchemy import __version__ as sqlalchemy_version
 from sqlalchemy.sql.expression import Executable, ClauseElement, select
 from sqlalchemy.ext.compiler import compiles
+import weakref
 
 
 # We need to use an older select() API when working with SqlAlchemy 1.3
 # or lower. We could use an external library to parse SqlAlchemy's version
 # string properly, but we don't want to add an unnecessary dependency for a
 # rather trivial operation like this.
-sqlalchemy_version_parts = sqlalchemy_version.split('.', maxsplit=2)
-sqlalchemy_major_version = int(sqlalchemy_version_parts[0])
-sqlalchemy_minor_version = int(sqlalchemy_version_parts[1])
-_USE_OLD_STYLE_SELECT = (
-    sqlalchemy_major_version < 1
-    or (sqlalchemy_major_version == 1 and sqlalchemy_minor_version < 4))
+_USE_OLD_STYLE_SELECT = tuple(
+    int(part) for part in sqlalchemy_version.split('.', maxsplit=2)[:2]
+) < (1, 4)
 
 
 class DropView(Executable, ClauseElement):
@@ -74,8 +72,19 @@ def visit_create_view(element, compiler, **kw):
      )
 
 
-def generate_create_inheritance_view_statement(class_):
-    viewname = class_.__tablename__[1:]
+# the joined tables and the columns of each class's inheritance view
+_view_columns_cache = weakref.WeakKeyDictionary()
+
+
+def _inheritance_view_columns(class_):
+    """
+    Returns the tables to select from (joined, if necessary) and the columns
+    of the inheritance view of given *class_*. The result is cached per class.
+    """
+    try:
+        return _view_columns_cache[class_]
+    except KeyError:
+        pass
     tables = class_.__table__
     cols = {}
 
@@ -86,41 +95,44 @@ def generate_create_inheritance_view_statement(class_):
 
     add_cols(class_.__table__)
     if class_.__score_sa_orm__['inheritance'] is not None:
-        parent = class_.__score_sa_orm__['parent']
-        while parent:
+        for parent in class_.__score_sa_orm__['parent_chain']:
             table = parent.__table__
             tables = tables.join(
                 table, onclause=table.c.id == class_.__table__.c.id)
             add_cols(table)
-            parent = parent.__score_sa_orm__['parent']
+    result = _view_columns_cache[class_] = (tables, tuple(cols.values()))
+    return result
+
+
+def generate_create_inheritance_view_statement(class_):
+    viewname = class_.__score_sa_orm__['short_name']
+    tables, cols = _inheritance_view_columns(class_)
     if class_.__score_sa_orm__['inheritance'] != 'single-table':
         if _USE_OLD_STYLE_SELECT:
-            viewselect = select(cols.values(), from_obj=tables)
+            viewselect = select(list(cols), from_obj=tables)
         else:
-            viewselect = select(*cols.values())\
+            viewselect = select(*cols)\
                 .select_from(tables)
     else:
         typecol = getattr(
             class_, class_.__score_sa_orm__['type_column'])
         typenames = []
-
-        def add_typenames(cls):
+        pending = [class_]
+        while pending:
+            cls = pending.pop()
             typenames.append(cls.__score_sa_orm__['type_name'])
-            for subclass in cls.__subclasses__():
-                add_typenames(subclass)
-
-        add_typenames(class_)
+            pending.extend(cls.__subclasses__())
         if _USE_OLD_STYLE_SELECT:
-            viewselect = select(cols.values(),
+            viewselect = select(list(cols),
                                 from_obj=class_.__table__,
                                 whereclause=typecol.in_(typenames))
         else:
-            viewselect = select(*cols.values())\
+            viewselect = select(*cols)\
                 .select_from(class_.__table__)\
                 .where(typecol.in_(typenames))
     return CreateView(viewname, viewselect)
 
 
 def generate_drop_inheritance_view_statement(class_):
-    viewname = class_.__tablename__[1:]
+    viewname = class_.__score_sa_orm__['short_name']
     return DropView(viewname)
@@ -46,6 +46,7 @@ setup(
     namespace_packages=['score', 'score.sa'],
     zip_safe=False,
     license='LGPL',
+    python_requires='>=3.6',
     classifiers=[
         'Development Status :: 4 - Beta',
         'Environment :: Console',
@@ -56,7 +57,7 @@ setup(
         'Operating System :: OS Independent',
         'Programming Language :: SQL',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3.6',
         'Topic :: Software Development :: Libraries :: Application Frameworks',
         'Topic :: Database :: Front-Ends',
     ],